@@ -16,6 +16,8 @@ import logging
 from datetime import datetime
 from firearm_generator import FirearmGenerator
 from twitter_poster import TwitterPoster
+from prewarmer import CachePrewarmer
+from config import PREWARM_ENABLED, PREWARM_SLOT_MARGIN_SECONDS
 
 # Set up logging
 logging.basicConfig(
@@ -35,6 +37,7 @@ class FirearmBot:
         logger.info("Initializing Firearm Bot...")
         self.generator = FirearmGenerator()
         self.poster = TwitterPoster()
+        self.prewarmer = CachePrewarmer(self.generator, self.poster) if PREWARM_ENABLED else None
         logger.info("Bot initialized successfully!")
     
     def post_firearm(self):
@@ -44,9 +47,14 @@ class FirearmBot:
             logger.info(f"Starting new post at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             logger.info("=" * 60)
             
-            # Generate firearm information
-            logger.info("Generating firearm information...")
-            firearm_info = self.generator.generate_firearm_info()
+            # Use a firearm prepared during idle time, or generate one now
+            firearm_info = self.prewarmer.take_prepared() if self.prewarmer else None
+            prewarmed = firearm_info is not None
+            if prewarmed:
+                logger.info("Using prewarmed firearm information")
+            else:
+                logger.info("Generating firearm information...")
+                firearm_info = self.generator.generate_firearm_info()
             
             if not firearm_info:
                 logger.error("Failed to generate firearm information")
@@ -59,6 +67,18 @@ class FirearmBot:
             logger.info("Searching for firearm image...")
             image_url = self.generator.search_firearm_image(firearm_info['name'])
             
+            # A prewarmed firearm may not have had its image resolved yet; don't lose the post over it
+            if not image_url and prewarmed:
+                logger.warning("No image for prewarmed firearm, generating a new one...")
+                firearm_info = self.generator.generate_firearm_info()
+                
+                if not firearm_info:
+                    logger.error("Failed to generate firearm information")
+                    return False
+                
+                logger.info(f"Generated: {firearm_info['name']}")
+                image_url = self.generator.search_firearm_image(firearm_info['name'])
+            
             if not image_url:
                 logger.error("Failed to generate firearm image")
                 return False
@@ -85,6 +105,14 @@ class FirearmBot:
             logger.error(f"Error in post_firearm: {e}", exc_info=True)
             return False
     
+    def prewarm(self, deadline):
+        """Prewarm caches until the deadline, stopping well before the next scheduled post"""
+        idle_seconds = schedule.idle_seconds()
+        if idle_seconds is None or idle_seconds <= PREWARM_SLOT_MARGIN_SECONDS:
+            return
+        
+        self.prewarmer.run_idle(min(deadline, time.time() + idle_seconds - PREWARM_SLOT_MARGIN_SECONDS))
+    
     def run(self):
         """Run the bot with hourly scheduling"""
         logger.info("Starting Firearm Bot...")
@@ -105,7 +133,13 @@ class FirearmBot:
         try:
             while True:
                 schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                next_check = time.time() + 60  # Check every minute
+                
+                # Use the idle time before the next check to warm caches
+                if self.prewarmer:
+                    self.prewarm(next_check)
+                
+                time.sleep(max(0, next_check - time.time()))
                 
         except KeyboardInterrupt:
             logger.info("\nBot stopped by user")
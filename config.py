@@ -12,6 +12,22 @@ TWITTER_ACCESS_TOKEN_SECRET = os.environ.get('TWITTER_ACCESS_TOKEN_SECRET', '')
 # OpenAI API Credentials
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
+# Idle-time cache prewarming (used by the long-running bot.py daemon)
+PREWARM_ENABLED = os.environ.get('PREWARM_ENABLED', 'true').lower() == 'true'
+PREWARM_MAX_REQUESTS_PER_HOUR = int(os.environ.get('PREWARM_MAX_REQUESTS_PER_HOUR', '60'))
+PREWARM_MAX_BYTES_PER_HOUR = int(os.environ.get('PREWARM_MAX_BYTES_PER_HOUR', str(50 * 1024 * 1024)))
+PREWARM_QUEUE_SIZE = int(os.environ.get('PREWARM_QUEUE_SIZE', '1'))
+# OpenAI completions are paid, so they get their own cap within the hourly window
+PREWARM_MAX_GENERATIONS_PER_HOUR = int(os.environ.get('PREWARM_MAX_GENERATIONS_PER_HOUR', '3'))
+# Stop prewarming this many seconds before a scheduled post. Requests and streamed reads
+# stop at this deadline; the margin covers the last socket read and decoding the image.
+PREWARM_SLOT_MARGIN_SECONDS = int(os.environ.get('PREWARM_SLOT_MARGIN_SECONDS', '120'))
+
+# Local cache for image lookups and processed media
+CACHE_DIR = os.environ.get('CACHE_DIR', '/tmp/firearm-bot-cache')
+CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', str(6 * 60 * 60)))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '100'))
+
 # Instructions:
 # 1. For GitHub Actions: Add all keys as GitHub Secrets (see GITHUB_SETUP.md)
 # 2. For local testing: Replace empty strings above with your actual API keys
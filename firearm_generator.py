@@ -1,8 +1,12 @@
 import json
+import time
 import random
 import requests
 from openai import OpenAI
-from config import OPENAI_API_KEY
+from config import OPENAI_API_KEY, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+
+class RequestLimitReached(Exception):
+    """Raised when a request would exceed the active request/bandwidth budget or deadline"""
 
 class FirearmGenerator:
     def __init__(self):
@@ -13,6 +17,17 @@ class FirearmGenerator:
             'User-Agent': 'FirearmBot/1.0 (Educational Twitter Bot)'
         }
         
+        # Resolved image URLs for previously generated firearms: name -> (image_url, resolved_at)
+        self.image_cache = {}
+        
+        # Network usage counters, read by the prewarmer to enforce its budget
+        self.request_count = 0
+        self.bytes_downloaded = 0
+        
+        # Optional limiter consulted before every request (set by the prewarmer while it works).
+        # Its before_request(timeout) returns (timeout, max_bytes, deadline) or raises RequestLimitReached.
+        self.limiter = None
+        
         # Historical periods with appropriate firearm types
         self.period_types = {
             "American Civil War Era (1860s)": ["rifle musket", "revolver", "carbine", "rifle"],
@@ -53,6 +68,8 @@ Examples of good responses:
 Make sure the firearm is real, historically accurate, and actually existed during the specified period."""
 
         try:
+            timeout, _, _ = self._before_request(60)
+            self.request_count += 1
             response = self.client.chat.completions.create(
                 model="gpt-4.1-mini",
                 messages=[
@@ -60,7 +77,8 @@ Make sure the firearm is real, historically accurate, and actually existed durin
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=600
+                max_tokens=600,
+                timeout=timeout
             )
             
             content = response.choices[0].message.content.strip()
@@ -81,11 +99,80 @@ Make sure the firearm is real, historically accurate, and actually existed durin
             
             return firearm_data
             
+        except RequestLimitReached:
+            raise
         except Exception as e:
             print(f"Error generating firearm info: {e}")
             return None
     
-    def search_firearm_image(self, firearm_name):
+    def _before_request(self, timeout):
+        """Consult the limiter, if any, for the timeout, byte cap and deadline of the next request"""
+        if self.limiter:
+            return self.limiter.before_request(timeout)
+        return timeout, None, None
+    
+    def _get_json(self, url, params):
+        """GET a Wikipedia/Wikimedia API endpoint and return the parsed JSON, or None on HTTP errors"""
+        timeout, max_bytes, deadline = self._before_request(15)
+        
+        with requests.get(url, params=params, headers=self.headers, timeout=timeout, stream=True) as response:
+            self.request_count += 1
+            
+            if response.status_code != 200:
+                return None
+            
+            # Read in chunks so the byte cap and deadline hold even for slow or unsized responses
+            content = bytearray()
+            for chunk in response.iter_content(chunk_size=16384):
+                content.extend(chunk)
+                if max_bytes is not None and len(content) > max_bytes:
+                    self.bytes_downloaded += len(content)
+                    raise RequestLimitReached("Response exceeds remaining bandwidth budget")
+                if deadline is not None and time.time() > deadline:
+                    self.bytes_downloaded += len(content)
+                    raise RequestLimitReached("Prewarm deadline reached")
+        
+        self.bytes_downloaded += len(content)
+        return json.loads(content)
+    
+    def get_cached_image_url(self, firearm_name):
+        """Return the cached image URL for a firearm if it is still fresh"""
+        entry = self.image_cache.get(firearm_name)
+        if entry and time.time() - entry[1] < CACHE_TTL_SECONDS:
+            return entry[0]
+        return None
+    
+    def evict_stale_images(self):
+        """Drop cached image lookups that have expired"""
+        now = time.time()
+        for name in [name for name, (image_url, resolved_at) in self.image_cache.items()
+                     if now - resolved_at >= CACHE_TTL_SECONDS]:
+            del self.image_cache[name]
+    
+    def search_firearm_image(self, firearm_name, use_cache=True):
+        """Search for a real image of the firearm, reusing a fresh cached result when possible"""
+        
+        if use_cache:
+            image_url = self.get_cached_image_url(firearm_name)
+            if image_url:
+                print(f"  ✓ Using cached image for: {firearm_name}")
+                return image_url
+        
+        image_url = self.resolve_firearm_image(firearm_name)
+        
+        if image_url:
+            self.image_cache[firearm_name] = (image_url, time.time())
+            
+            # Keep only the most recently resolved firearms
+            if len(self.image_cache) > CACHE_MAX_ENTRIES:
+                oldest = min(self.image_cache, key=lambda name: self.image_cache[name][1])
+                del self.image_cache[oldest]
+        else:
+            self.image_cache.pop(firearm_name, None)
+        
+        return image_url
+    
+    def resolve_firearm_image(self, firearm_name):
         """Search for a real image of the firearm using Wikipedia"""
         
         print(f"Searching for images of: {firearm_name}")
@@ -123,12 +210,11 @@ Make sure the firearm is real, historically accurate, and actually existed durin
                 'iiprop': 'url'
             }
             
-            response = requests.get(wiki_api_url, params=params, headers=self.headers, timeout=15)
+            data = self._get_json(wiki_api_url, params)
             
-            if response.status_code != 200:
+            if data is None:
                 return None
             
-            data = response.json()
             pages = data.get('query', {}).get('pages', {})
             
             for page_id, page_data in pages.items():
@@ -139,6 +225,8 @@ Make sure the firearm is real, historically accurate, and actually existed durin
             
             return None
             
+        except RequestLimitReached:
+            raise
         except Exception as e:
             print(f"  Error getting Wikipedia image: {e}")
             return None
@@ -157,12 +245,11 @@ Make sure the firearm is real, historically accurate, and actually existed durin
                 'srlimit': 3
             }
             
-            response = requests.get(wiki_api_url, params=search_params, headers=self.headers, timeout=15)
+            data = self._get_json(wiki_api_url, search_params)
             
-            if response.status_code != 200:
+            if data is None:
                 return None
             
-            data = response.json()
             search_results = data.get('query', {}).get('search', [])
             
             if not search_results:
@@ -179,6 +266,8 @@ Make sure the firearm is real, historically accurate, and actually existed durin
             
             return None
             
+        except RequestLimitReached:
+            raise
         except Exception as e:
             print(f"  Error searching Wikipedia: {e}")
             return None
@@ -198,12 +287,11 @@ Make sure the firearm is real, historically accurate, and actually existed durin
                 'srlimit': 5
             }
             
-            response = requests.get(commons_api_url, params=search_params, headers=self.headers, timeout=15)
+            data = self._get_json(commons_api_url, search_params)
             
-            if response.status_code != 200:
+            if data is None:
                 return None
             
-            data = response.json()
             search_results = data.get('query', {}).get('search', [])
             
             if not search_results:
@@ -222,12 +310,11 @@ Make sure the firearm is real, historically accurate, and actually existed durin
                     'format': 'json'
                 }
                 
-                response = requests.get(commons_api_url, params=image_params, headers=self.headers, timeout=15)
+                data = self._get_json(commons_api_url, image_params)
                 
-                if response.status_code != 200:
+                if data is None:
                     continue
                 
-                data = response.json()
                 pages = data.get('query', {}).get('pages', {})
                 
                 for page_id, page_data in pages.items():
@@ -238,6 +325,8 @@ Make sure the firearm is real, historically accurate, and actually existed durin
             
             return None
             
+        except RequestLimitReached:
+            raise
         except Exception as e:
             print(f"  Error searching Wikimedia Commons: {e}")
             return None
@@ -0,0 +1,277 @@
+"""
+Idle-time cache prewarmer for the long-running bot
+
+Uses the time between scheduled posts to:
+- generate upcoming firearms ahead of time and resolve their images
+- download and process their media into the local cache
+- refresh expired image lookups for queued firearms
+
+Every request is checked against an hourly request and bandwidth budget
+and against the deadline before the next scheduled post.
+"""
+
+import os
+import time
+import logging
+from firearm_generator import RequestLimitReached
+from config import (
+    PREWARM_MAX_REQUESTS_PER_HOUR,
+    PREWARM_MAX_BYTES_PER_HOUR,
+    PREWARM_MAX_GENERATIONS_PER_HOUR,
+    PREWARM_QUEUE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Cached media older than this is removed from disk
+MEDIA_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+class CachePrewarmer:
+    def __init__(self, generator, poster):
+        """Initialize the prewarmer around the bot's generator and poster"""
+        self.generator = generator
+        self.poster = poster
+
+        # Firearm info dicts generated ahead of time for upcoming posts
+        self.prepared = []
+
+        # Names whose media download failed this window; post_firearm downloads them instead
+        self.deferred = set()
+
+        # Usage within the current hourly budget window
+        self.window_start = time.time()
+        self.requests_used = 0
+        self.bytes_used = 0
+        self.generations_used = 0
+
+        # Set while a step runs: the deadline and the counters when the step started
+        self.deadline = 0
+        self.step_start = None
+
+    def take_prepared(self):
+        """Return the next prepared firearm, or None if nothing is queued"""
+        if not self.prepared:
+            return None
+        firearm_info = self.prepared.pop(0)
+        self.deferred.discard(firearm_info['name'])
+        return firearm_info
+
+    def has_budget(self):
+        """Check whether the current hourly window still has requests and bandwidth left"""
+        now = time.time()
+        if now - self.window_start >= 60 * 60:
+            self.window_start = now
+            self.requests_used = 0
+            self.bytes_used = 0
+            self.generations_used = 0
+            self.deferred.clear()
+
+        return (self.requests_used < PREWARM_MAX_REQUESTS_PER_HOUR and
+                self.bytes_used < PREWARM_MAX_BYTES_PER_HOUR)
+
+    def counters(self):
+        """Total requests and bytes spent by the generator and poster"""
+        return (self.generator.request_count + self.poster.request_count,
+                self.generator.bytes_downloaded + self.poster.bytes_downloaded)
+
+    def usage(self):
+        """Requests and bytes spent in the current window, including the step in progress"""
+        if self.step_start is None:
+            return self.requests_used, self.bytes_used
+
+        requests_now, bytes_now = self.counters()
+        return (self.requests_used + requests_now - self.step_start[0],
+                self.bytes_used + bytes_now - self.step_start[1])
+
+    def before_request(self, timeout):
+        """Check the budget and deadline before a request, returning (timeout, max_bytes, deadline) for it"""
+        requests_used, bytes_used = self.usage()
+        if requests_used >= PREWARM_MAX_REQUESTS_PER_HOUR or bytes_used >= PREWARM_MAX_BYTES_PER_HOUR:
+            raise RequestLimitReached("Prewarm budget exhausted")
+
+        remaining_time = self.deadline - time.time()
+        if remaining_time <= 1:
+            raise RequestLimitReached("Prewarm deadline reached")
+
+        return min(timeout, remaining_time), PREWARM_MAX_BYTES_PER_HOUR - bytes_used, self.deadline
+
+    def run_idle(self, deadline):
+        """Prewarm until the deadline, the budget runs out or everything is warm"""
+        self.deadline = deadline
+        while time.time() < deadline and self.has_budget():
+            if not self.step():
+                break
+
+    def step(self):
+        """Perform one unit of prewarming work, returning False when there is nothing more to do now"""
+        self.step_start = self.counters()
+        self.generator.limiter = self
+
+        try:
+            return self._step()
+        except RequestLimitReached as e:
+            logger.info(f"Prewarm: pausing ({e})")
+            return False
+        except Exception as e:
+            logger.error(f"Error while prewarming: {e}", exc_info=True)
+            return False
+        finally:
+            self.requests_used, self.bytes_used = self.usage()
+            self.generator.limiter = None
+            self.step_start = None
+
+    def _step(self):
+        # Keep the queue of upcoming firearms full; a failed attempt ends this idle slice
+        if len(self.prepared) < PREWARM_QUEUE_SIZE:
+            return self.prepare_firearm()
+
+        # Make sure every queued firearm has a fresh image lookup and its media on disk
+        for firearm_info in list(self.prepared):
+            if firearm_info['name'] not in self.deferred and not self.is_warm(firearm_info):
+                self.warm_media(firearm_info)
+                return True
+
+        # Firearms from earlier generations won't be posted again, so just drop expired entries
+        self.generator.evict_stale_images()
+        self.poster.prune_media_cache(MEDIA_MAX_AGE_SECONDS)
+        return False
+
+    def is_warm(self, firearm_info):
+        """Check whether a queued firearm can be posted without any network lookups"""
+        image_url = self.generator.get_cached_image_url(firearm_info['name'])
+        return bool(image_url) and os.path.exists(self.poster.cached_image_path(image_url))
+
+    def prepare_firearm(self):
+        """Generate an upcoming firearm and resolve its image, returning whether one was queued"""
+        if self.generations_used >= PREWARM_MAX_GENERATIONS_PER_HOUR:
+            return False
+
+        logger.info("Prewarm: generating upcoming firearm...")
+        self.generations_used += 1
+        firearm_info = self.generator.generate_firearm_info()
+
+        if not firearm_info:
+            logger.info("Prewarm: generation failed, retrying in a later idle slice")
+            return False
+
+        try:
+            image_url = self.generator.search_firearm_image(firearm_info['name'])
+        except RequestLimitReached:
+            # Keep the generated firearm; warm_media resolves its image later
+            self.prepared.append(firearm_info)
+            raise
+
+        # A firearm without an image cannot be posted, so don't queue it
+        if not image_url:
+            logger.info(f"Prewarm: no image for {firearm_info['name']}, discarding")
+            return False
+
+        logger.info(f"Prewarm: prepared {firearm_info['name']}")
+        self.prepared.append(firearm_info)
+        return True
+
+    def warm_media(self, firearm_info):
+        """Download a queued firearm's image into the media cache, re-resolving an expired lookup"""
+        name = firearm_info['name']
+        image_url = self.generator.search_firearm_image(name)
+
+        if not image_url:
+            logger.info(f"Prewarm: no image for {name} anymore, discarding")
+            self.prepared.remove(firearm_info)
+            return
+
+        # The download and PIL decode double as the check that the URL serves a valid image
+        timeout, max_bytes, deadline = self.before_request(30)
+        if not self.poster.cache_image(image_url, max_bytes=max_bytes, timeout=timeout, deadline=deadline):
+            logger.info(f"Prewarm: could not cache media for {name}, will download at post time")
+            self.deferred.add(name)
+            return
+
+        logger.info(f"Prewarm: cached media for {name}")
+
+if __name__ == "__main__":
+    # Smoke test the budget and queue logic with stub components (no network access)
+    class StubGenerator:
+        def __init__(self):
+            self.request_count = 0
+            self.bytes_downloaded = 0
+            self.limiter = None
+            self.image_cache = {}
+
+        def generate_firearm_info(self):
+            self.limiter.before_request(60)
+            self.request_count += 1
+            return {'name': 'M1 Garand', 'description': 'Test firearm'}
+
+        def search_firearm_image(self, firearm_name, use_cache=True):
+            if firearm_name not in self.image_cache:
+                self.limiter.before_request(15)
+                self.request_count += 1
+                self.bytes_downloaded += 2048
+                self.image_cache[firearm_name] = 'https://example.org/m1_garand.jpg'
+            return self.image_cache[firearm_name]
+
+        def get_cached_image_url(self, firearm_name):
+            return self.image_cache.get(firearm_name)
+
+        def evict_stale_images(self):
+            pass
+
+    class StubPoster:
+        def __init__(self):
+            self.request_count = 0
+            self.bytes_downloaded = 0
+
+        def cached_image_path(self, image_url):
+            return os.path.join('/nonexistent', os.path.basename(image_url))
+
+        def cache_image(self, image_url, max_bytes=None, timeout=30, deadline=None):
+            # Simulate a failed download
+            self.request_count += 1
+            return None
+
+        def prune_media_cache(self, max_age):
+            pass
+
+    print("Testing cache prewarmer...\n")
+
+    # has_budget resets at the window boundary
+    prewarmer = CachePrewarmer(StubGenerator(), StubPoster())
+    prewarmer.requests_used = PREWARM_MAX_REQUESTS_PER_HOUR
+    assert not prewarmer.has_budget()
+    prewarmer.window_start -= 60 * 60
+    assert prewarmer.has_budget() and prewarmer.requests_used == 0
+    print("✓ Budget resets at the window boundary")
+
+    # A failed download keeps the firearm queued instead of generating a new one
+    generator = StubGenerator()
+    prewarmer = CachePrewarmer(generator, StubPoster())
+    prewarmer.run_idle(time.time() + 10)
+    assert [f['name'] for f in prewarmer.prepared] == ['M1 Garand']
+    assert 'M1 Garand' in prewarmer.deferred
+    assert generator.request_count == 2
+    assert prewarmer.usage() == (3, 2048)
+    print("✓ Firearm stays queued when its download fails")
+
+    # No requests are started past the deadline, even inside a step
+    generator = StubGenerator()
+    prewarmer = CachePrewarmer(generator, StubPoster())
+    prewarmer.run_idle(time.time() - 1)
+    prewarmer.run_idle(time.time() + 0.5)
+    assert generator.request_count == 0 and not prewarmer.prepared
+    print("✓ run_idle respects the deadline")
+
+    # A failed generation ends the idle slice, and generations are capped per window
+    class FailingGenerator(StubGenerator):
+        def generate_firearm_info(self):
+            super().generate_firearm_info()
+            return None
+
+    generator = FailingGenerator()
+    prewarmer = CachePrewarmer(generator, StubPoster())
+    prewarmer.run_idle(time.time() + 10)
+    assert generator.request_count == 1
+    for _ in range(PREWARM_MAX_GENERATIONS_PER_HOUR + 2):
+        prewarmer.run_idle(time.time() + 10)
+    assert generator.request_count == PREWARM_MAX_GENERATIONS_PER_HOUR
+    print("✓ Failed generations back off and are capped per window")
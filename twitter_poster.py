@@ -3,6 +3,9 @@ import requests
 from io import BytesIO
 from PIL import Image
 import os
+import time
+import hashlib
+from config import CACHE_DIR
 
 try:
     from config import (
@@ -50,16 +53,72 @@ class TwitterPoster:
         else:
             self.api_v1 = None
         
-    def download_image(self, image_url, save_path=None):
+        # Network usage counters, read by the prewarmer to enforce its budget
+        self.request_count = 0
+        self.bytes_downloaded = 0
+        
+    def cached_image_path(self, image_url):
+        """Path of the processed image for a URL in the local media cache"""
+        digest = hashlib.sha1(image_url.encode('utf-8')).hexdigest()
+        return os.path.join(CACHE_DIR, 'media', f"{digest}.jpg")
+    
+    def cache_image(self, image_url, max_bytes=None, timeout=30, deadline=None):
+        """Download and process an image into the local media cache"""
+        cache_path = self.cached_image_path(image_url)
+        if os.path.exists(cache_path):
+            return cache_path
+        
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        
+        # Write to a temporary file first so a partial download never looks cached
+        temp_path = f"{cache_path}.tmp"
+        if not self.download_image(image_url, save_path=temp_path, max_bytes=max_bytes, timeout=timeout,
+                                   deadline=deadline):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        
+        os.replace(temp_path, cache_path)
+        return cache_path
+    
+    def prune_media_cache(self, max_age):
+        """Remove cached images that have not been touched for max_age seconds"""
+        media_dir = os.path.join(CACHE_DIR, 'media')
+        if not os.path.isdir(media_dir):
+            return
+        
+        cutoff = time.time() - max_age
+        for filename in os.listdir(media_dir):
+            path = os.path.join(media_dir, filename)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        
+    def download_image(self, image_url, save_path=None, max_bytes=None, timeout=30, deadline=None):
         """Download image from URL and optionally save to disk"""
         try:
             print(f"Downloading image from: {image_url}")
             headers = {'User-Agent': 'FirearmBot/1.0 (Educational Twitter Bot)'}
-            response = requests.get(image_url, headers=headers, timeout=30)
-            response.raise_for_status()
+            with requests.get(image_url, headers=headers, timeout=timeout, stream=True) as response:
+                self.request_count += 1
+                response.raise_for_status()
+                
+                # Stop reading once the image outgrows the caller's bandwidth budget or deadline
+                content = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    content.extend(chunk)
+                    if max_bytes is not None and len(content) > max_bytes:
+                        self.bytes_downloaded += len(content)
+                        print(f"Image exceeds budget ({max_bytes} bytes), skipping")
+                        return None
+                    if deadline is not None and time.time() > deadline:
+                        self.bytes_downloaded += len(content)
+                        print("Image download ran past the deadline, skipping")
+                        return None
+            
+            self.bytes_downloaded += len(content)
             
             # Load image with PIL to ensure it's valid
-            img = Image.open(BytesIO(response.content))
+            img = Image.open(BytesIO(content))
             
             # Convert to RGB if necessary
             if img.mode != 'RGB':
@@ -102,9 +161,16 @@ class TwitterPoster:
             # Try to upload media if we have API v1.1 access
             if self.api_v1 and image_url:
                 try:
-                    # Download image to temporary file
                     temp_image_path = "/tmp/firearm_temp.jpg"
-                    image_path = self.download_image(image_url, save_path=temp_image_path)
+                    cached_path = self.cached_image_path(image_url)
+                    
+                    if os.path.exists(cached_path):
+                        # Use the image prepared ahead of time by the prewarmer
+                        print(f"Using cached image: {cached_path}")
+                        image_path = cached_path
+                    else:
+                        # Download image to temporary file
+                        image_path = self.download_image(image_url, save_path=temp_image_path)
                     
                     if image_path:
                         print("Uploading media to Twitter...")
@@ -113,7 +179,7 @@ class TwitterPoster:
                         print(f"Media uploaded successfully! Media ID: {media_id}")
                         
                         # Clean up temp file
-                        if os.path.exists(temp_image_path):
+                        if image_path == temp_image_path and os.path.exists(temp_image_path):
                             os.remove(temp_image_path)
                     
                 except Exception as e: